@@ -1,19 +1,31 @@
 # ai.py
+import functools
 import os
-import json
-from typing import Dict, Any, List
+from typing import Dict, Any, Tuple
+
+import orjson
+from openai import AsyncOpenAI
+
+@functools.lru_cache(maxsize=64)
+def _fallback_for_tickers(tickers: Tuple[str, ...]) -> Tuple[Dict[str, Any], ...]:
+    """
+    STAY trades for a given ticker tuple, memoized so a sustained AI outage
+    reuses the same trade dicts tick after tick (callers must not mutate them).
+    """
+    return tuple({"action": "STAY", "ticker": t, "quantity": 0} for t in tickers)
 
-from openai import OpenAI
 
 def _fallback_trades(tick_payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Simple, safe fallback: STAY on all tickers.
     """
-    trades = [
-        {"action": "STAY", "ticker": p.get("ticker"), "quantity": 0}
-        for p in tick_payload.get("Positions", [])
-        if isinstance(p, dict) and "ticker" in p
-    ]
+    positions = tick_payload.get("Positions") or []
+    tickers = tuple(p["ticker"] for p in positions if type(p) is dict and "ticker" in p)
+    try:
+        trades = list(_fallback_for_tickers(tickers))
+    except TypeError:
+        # Unhashable ticker values: build uncached
+        trades = [{"action": "STAY", "ticker": t, "quantity": 0} for t in tickers]
     return {
         "trades": trades,
         "rationale": "Fallback: STAY on all positions because AI was unavailable."
@@ -26,6 +38,13 @@ def _fallback_trades(tick_payload: Dict[str, Any]) -> Dict[str, Any]:
 API_KEY = os.getenv("OPENAI_API_KEY") or os.getenv("CHATGPT_API_KEY")
 MODEL = os.getenv("OPENAI_MODEL", "gpt-5-nano")
 
+# Build the client once so its connection pool is reused across ticks
+try:
+    _CLIENT = AsyncOpenAI(api_key=API_KEY) if API_KEY else None
+except Exception:
+    # Could not create client
+    _CLIENT = None
+
 SYSTEM_PROMPT = """
 You are an AI trading assistant. You receive:
 - The current portfolio positions
@@ -43,45 +62,47 @@ Keep the strategy conservative and explain your reasoning.
 
 PROPOSE_TRADES_TOOL = {
     "type": "function",
-    "function": {
-        "name": "propose_trades",
-        "description": "Propose trades for the next tick.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "trades": {
-                    "type": "array",
-                    "description": "List of trades to execute.",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "action": {
-                                "type": "string",
-                                "enum": ["BUY", "SELL", "STAY"],
-                                "description": "Type of trade"
-                            },
-                            "ticker": {
-                                "type": "string",
-                                "description": "Ticker symbol"
-                            },
-                            "quantity": {
-                                "type": "integer",
-                                "description": "Number of shares, 0 is allowed for STAY"
-                            },
+    "name": "propose_trades",
+    "description": "Propose trades for the next tick.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "trades": {
+                "type": "array",
+                "description": "List of trades to execute.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "action": {
+                            "type": "string",
+                            "enum": ["BUY", "SELL", "STAY"],
+                            "description": "Type of trade"
+                        },
+                        "ticker": {
+                            "type": "string",
+                            "description": "Ticker symbol"
+                        },
+                        "quantity": {
+                            "type": "integer",
+                            "description": "Number of shares, 0 is allowed for STAY"
                         },
-                        "required": ["action", "ticker", "quantity"],
                     },
-                },
-                "rationale": {
-                    "type": "string",
-                    "description": "Short explanation of the strategy."
+                    "required": ["action", "ticker", "quantity"],
                 },
             },
-            "required": ["trades", "rationale"],
+            "rationale": {
+                "type": "string",
+                "description": "Short explanation of the strategy."
+            },
         },
+        "required": ["trades", "rationale"],
     },
 }
 
+# Request pieces that never change between ticks, built once at import
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+_TOOLS = [PROPOSE_TRADES_TOOL]
+
 
 def _build_user_message(tick_payload: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -91,79 +112,87 @@ def _build_user_message(tick_payload: Dict[str, Any]) -> Dict[str, Any]:
     prices = tick_payload.get("Prices", {})
     news = tick_payload.get("News", "")
 
-    text = [
+    pos_lines = [
+        f"- {p['ticker']}: {p.get('quantity')} shares"
+        for p in positions
+        if isinstance(p, dict) and "ticker" in p
+    ]
+    price_lines = (
+        [f"- {ticker}: {price}" for ticker, price in prices.items()]
+        if isinstance(prices, dict)
+        else []
+    )
+    news_lines = ("", "News / Sentiment:", str(news)) if news else ()
+
+    content = "\n".join((
         "Here is the current tick data.",
         "",
         "Positions:",
-    ]
-    for p in positions:
-        if isinstance(p, dict):
-            text.append(f"- {p.get('ticker')}: {p.get('quantity')} shares")
-
-    text.append("")
-    text.append("Prices:")
-    if isinstance(prices, dict):
-        for ticker, price in prices.items():
-            text.append(f"- {ticker}: {price}")
-
-    if news:
-        text.append("")
-        text.append("News / Sentiment:")
-        text.append(str(news))
-
-    text.append("")
-    text.append("Please propose a small set of trades using the tool.")
+        *pos_lines,
+        "",
+        "Prices:",
+        *price_lines,
+        *news_lines,
+        "",
+        "Please propose a small set of trades using the tool.",
+    ))
 
-    return {"role": "user", "content": "\n".join(text)}
+    return {"role": "user", "content": content}
 
 
-def get_trade_recommendations(tick_payload: Dict[str, Any]) -> Dict[str, Any]:
+async def get_trade_recommendations_async(tick_payload: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Main entry point used by your Flask endpoint.
+    Main entry point used by the /tick endpoint (awaited on the event loop).
     Returns a dict:
     {
         "trades": [ { "action": "...", "ticker": "...", "quantity": ... }, ... ],
         "rationale": "..."
     }
     """
-    # If no API key, immediately fall back
-    if not API_KEY:
-        return _fallback_trades(tick_payload)
-
-    try:
-        client = OpenAI(api_key=API_KEY)
-    except Exception:
-        # Could not create client
+    # If no API key (or the client could not be built), immediately fall back
+    if _CLIENT is None:
         return _fallback_trades(tick_payload)
 
     user_msg = _build_user_message(tick_payload)
 
     try:
-        resp = client.responses.create(
+        # Stream the response so the tool-call arguments are accumulated as
+        # they arrive instead of waiting on the full HTTP body. Only the
+        # first propose_trades call is buffered: parallel tool calls would
+        # otherwise glue several JSON objects into one buffer.
+        args_buf = bytearray()
+        call_item_id = None
+        tool_args = None
+        async with _CLIENT.responses.stream(
             model=MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                user_msg,
-            ],
-            tools=[PROPOSE_TRADES_TOOL],
+            input=[_SYSTEM_MESSAGE, user_msg],
+            tools=_TOOLS,
             tool_choice="auto",
-            temperature=0.2,
-        )
-
-        # Expect a tool call in the first output
-        output_item = resp.output[0]
-        content_item = output_item.content[0]
-
-        tool_calls: List[Any] = getattr(content_item, "tool_calls", []) or []
-        if not tool_calls:
+        ) as stream:
+            async for event in stream:
+                if event.type == "response.output_item.added":
+                    item = event.item
+                    if (
+                        call_item_id is None
+                        and item.type == "function_call"
+                        and item.name == PROPOSE_TRADES_TOOL["name"]
+                    ):
+                        call_item_id = item.id
+                elif event.type == "response.function_call_arguments.delta":
+                    if event.item_id == call_item_id:
+                        args_buf += event.delta.encode("utf-8")
+                elif event.type == "response.function_call_arguments.done":
+                    if event.item_id == call_item_id:
+                        # Our call is complete; no need to wait for the rest
+                        tool_args = orjson.loads(args_buf)
+                        break
+                elif event.type == "response.completed":
+                    break
+
+        if not tool_args:
             # No tool call -> fall back
             return _fallback_trades(tick_payload)
 
-        tool_call = tool_calls[0]
-        # The `arguments` field is a JSON string according to the responses API
-        args_json = tool_call.arguments
-        tool_args = json.loads(args_json)
-
         trades = tool_args.get("trades", [])
         rationale = tool_args.get("rationale", "No rationale provided.")
 
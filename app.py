@@ -1,11 +1,51 @@
 # app.py
-from flask import Flask, request, jsonify, render_template
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+from typing import Any, Dict, Tuple
+
+import orjson
+from cachetools import TTLCache
+from quart import Quart, request, jsonify, render_template
+from quart.json.provider import DefaultJSONProvider
 from config import API_KEY
 from validators import validate_tick_payload
-from business import analyze_tick, load_dashboard_data
+from business import analyze_tick_async, close_clients, load_dashboard_data_async
 
-# single app object, with templates folder
-app = Flask(__name__, template_folder="templates")
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, used by jsonify and request.get_json.
+    Falls back to the stdlib for what orjson refuses (NaN/Infinity, integers
+    beyond 64 bits) so those payloads behave as they always have.
+    """
+
+    def dumps(self, obj, **kwargs):
+        try:
+            return orjson.dumps(obj, default=self.default).decode("utf-8")
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            return json.loads(s)
+
+
+# single app object, with templates folder (served by an ASGI server, e.g.
+#   hypercorn app:app --workers 1 --worker-class asyncio, see startup.sh)
+app = Quart(__name__, template_folder="templates")
+app.json = OrjsonProvider(app)
+
+
+@app.after_serving
+async def shutdown():
+    await close_clients()
 
 
 # ---------- Helpers ----------
@@ -14,24 +54,78 @@ def unauthorized():
     return jsonify({"result": "failure", "message": "Unauthorized"}), 401
 
 
+# /tick coalescing: concurrent calls with the same trade_id and payload share
+# one run, and successful results are replayed to retries for a short window
+_INFLIGHT: Dict[Tuple[str, str], asyncio.Task] = {}
+_RECENT: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+
+def _tick_key(payload: Dict[str, Any], trade_id: str) -> Tuple[str, str]:
+    """(trade_id, digest of the canonical payload), so a reused id with a
+    different payload is never answered with another run's result."""
+    canonical = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return trade_id, hashlib.sha256(canonical).hexdigest()
+
+
+async def _run_tick(payload: Dict[str, Any], trade_id: str, key: Tuple[str, str]) -> Dict[str, Any]:
+    result = await analyze_tick_async(payload, trade_id)
+
+    # Ensure minimum required structure
+    result.setdefault("result", "success")
+    result.setdefault("summary", {"positions_evaluated": 0, "unrealized_pnl": 0.0})
+    result.setdefault("decisions", [])
+
+    # Only replay trades mothership accepted; failures stay retryable
+    if result.get("http_status_mothership") == 200:
+        _RECENT[key] = result
+    return result
+
+
+def _finish_run(key: Tuple[str, str], task: asyncio.Task) -> None:
+    if _INFLIGHT.get(key) is task:
+        del _INFLIGHT[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved even if every caller went away
+
+
+async def analyze_tick_once(payload: Dict[str, Any], trade_id: str) -> Dict[str, Any]:
+    """Run business.analyze_tick_async at most once per trade_id and payload at a time."""
+    key = _tick_key(payload, trade_id)
+    cached = _RECENT.get(key)
+    if cached is not None:
+        return cached
+
+    task = _INFLIGHT.get(key)
+    if task is None:
+        # The run is its own task so no single caller owns it
+        task = asyncio.ensure_future(_run_tick(payload, trade_id, key))
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda t: _finish_run(key, t))
+
+    # shield: a disconnecting caller must not cancel the shared run
+    return await asyncio.shield(task)
+
+
 def require_apikey() -> bool:
     """Checks if request header 'apikey' matches the value in .env."""
     header_val = request.headers.get("apikey", "")
-    # DEBUG: show what we got vs what we expect
-    print(f"[auth] header apikey='{header_val}' | expected='{API_KEY}'")
-    return header_val.strip() == API_KEY
+    # DEBUG only: never log the key values themselves
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[auth] apikey header %s", "present" if header_val else "missing")
+    # constant-time comparison; bytes so non-ASCII headers fail cleanly
+    return hmac.compare_digest(header_val.strip().encode("utf-8"), API_KEY.encode("utf-8"))
 
 
 # ---------- Routes ----------
 
 @app.route("/", methods=["GET"])
-def root():
+async def root():
     """Root endpoint — open to anyone."""
     return jsonify({"result": "success", "message": "Strategy API Server running."})
 
 
 @app.route("/healthcheck", methods=["GET"])
-def healthcheck():
+async def healthcheck():
     """
     Authenticated route for system health.
     Must still work exactly like Assignment 5.
@@ -46,11 +140,12 @@ def healthcheck():
 
 
 @app.route("/tick/<string:trade_id>", methods=["POST"])
-def tick(trade_id: str):
+async def tick(trade_id: str):
     """
     Authenticated POST route that:
       - Validates payload (with DAY now as 'yyyy-mm-dd' string inside market_history)
-      - Calls business.analyze_tick(payload, trade_id)
+      - Awaits business.analyze_tick_async(payload, trade_id), coalescing
+        duplicate calls for the same trade_id and payload
       - Business layer logs AI recommendations, updates files,
         and posts to mothership /make_trade using the given trade_id.
     """
@@ -63,7 +158,7 @@ def tick(trade_id: str):
             "message": "Invalid payload: Content-Type must be application/json"
         }), 400
 
-    payload = request.get_json(silent=True)
+    payload = await request.get_json(silent=True)
     if payload is None:
         return jsonify({
             "result": "failure",
@@ -75,13 +170,7 @@ def tick(trade_id: str):
         return jsonify({"result": "failure", "message": msg}), 400
 
     try:
-        result = analyze_tick(payload, trade_id)
-
-        # Ensure minimum required structure
-        result.setdefault("result", "success")
-        result.setdefault("summary", {"positions_evaluated": 0, "unrealized_pnl": 0.0})
-        result.setdefault("decisions", [])
-
+        result = await analyze_tick_once(payload, trade_id)
         return jsonify(result), 200
     except Exception as e:
         return jsonify({
@@ -91,30 +180,30 @@ def tick(trade_id: str):
 
 
 @app.route("/dashboard", methods=["GET"])
-def dashboard():
+async def dashboard():
     """
     Public dashboard (NO API KEY REQUIRED).
     Uses Jinja template to display current positions and trading history.
     """
-    positions, trades = load_dashboard_data()
-    return render_template("dashboard.html", positions=positions, trades=trades)
+    positions, trades = await load_dashboard_data_async()
+    return await render_template("dashboard.html", positions=positions, trades=trades)
 
 
 # ---------- Error handlers ----------
 
 @app.errorhandler(404)
-def not_found(_):
+async def not_found(_):
     return jsonify({"result": "failure", "message": "Not Found"}), 404
 
 
 @app.errorhandler(405)
-def method_not_allowed(_):
+async def method_not_allowed(_):
     return jsonify({"result": "failure", "message": "Method Not Allowed"}), 405
 
 
 @app.errorhandler(500)
-def internal_error(_):
-    # Let Flask's default logs capture the original exception; return generic JSON
+async def internal_error(_):
+    # Let Quart's default logs capture the original exception; return generic JSON
     return jsonify({"result": "failure", "message": "Internal Server Error"}), 500
 
 
@@ -1,81 +1,201 @@
 # business.py
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
-import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
 import os
-import requests
+import random
+import time
+import httpx
+import orjson
 
-from ai import get_trade_recommendations
+from ai import get_trade_recommendations_async
+
+# No handler of its own: errors reach stderr via logging's last resort
+# unless the server configures logging
+logger = logging.getLogger(__name__)
 
 POSITIONS_FILE = Path(__file__).resolve().with_name("current_positions.json")
-TRADES_FILE = Path(__file__).resolve().with_name("trading_history.json")
+TRADES_FILE = Path(__file__).resolve().with_name("trading_history.jsonl")
+DASHBOARD_HISTORY_LIMIT = 500  # most recent trade-log entries shown on /dashboard
+_TAIL_BLOCK_SIZE = 64 * 1024
 
 MOTHERSHIP_URL = os.getenv("MOTHERSHIP_URL", "https://mothership-crg7hzedd6ckfegv.eastus-01.azurewebsites.net")
 TRADE_ENDPOINT = f"{MOTHERSHIP_URL}/make_trade"
 TRADE_API_KEY = os.getenv("MOTHERSHIP_X_API_KEY", "SET_ME")  # generated from genkey site
 
+# Dedicated single-thread pool for disk I/O: keeps file writes off the event
+# loop, isolated from other executor work, and applied in submission order
+_IO_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-io")
+
+# Mothership call tuning: (connect, read) timeouts, one retry on connect
+# failures only, and a simple circuit breaker that fails fast after
+# repeated errors
+MOTHERSHIP_TIMEOUT = httpx.Timeout(8.0, connect=2.0)
+MOTHERSHIP_RETRIES = 1
+RETRY_BACKOFF_S = 0.25
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN_S = 30.0
+_BREAKER = {"failures": 0, "opened_at": 0.0}
+
+# Optional batching: when enabled (and the platform accepts it), trades from
+# back-to-back ticks are buffered for up to BATCH_FLUSH_S and sent as one
+# {"batch": [{"id": ..., "trades": [...]}, ...]} POST. The batch size starts
+# at 1 and grows by BATCH_GROWTH_FACTOR per flush up to BATCH_MAX_SIZE.
+# Any response other than a well-formed batch 200 disables batching; on a
+# 4xx (batch rejected, nothing applied) those ticks are resent one by one.
+MOTHERSHIP_BATCHING = os.getenv("MOTHERSHIP_BATCHING", "").strip().lower() in ("1", "true", "yes")
+BATCH_FLUSH_S = 0.05
+BATCH_MAX_SIZE = 10
+BATCH_GROWTH_FACTOR = 2
+_PENDING: deque = deque()  # (trade_id, trades, future) awaiting a flush
+_BATCH = {"supported": True, "limit": 1}
+_BATCH_WAKEUP = asyncio.Event()
+_batch_flusher: Optional[asyncio.Task] = None
+_BATCH_SENDS: set = set()  # in-flight flush tasks (kept referenced until done)
+
+# Shared async client: pooled keep-alive connections, with HTTP/2 so
+# concurrent ticks multiplex over one connection to mothership
+_async_client = httpx.AsyncClient(
+    http2=True,
+    timeout=MOTHERSHIP_TIMEOUT,
+    limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+)
+
 def _read_json_list(path: Path) -> List[Dict[str, Any]]:
     if not path.exists():
         return []
     try:
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = orjson.loads(path.read_bytes())
         if isinstance(data, list):
             return data
         return []
     except Exception:
         return []
 
-def _write_json_list(path: Path, data: List[Dict[str, Any]]) -> None:
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def _read_jsonl_tail(path: Path, limit: int) -> List[Dict[str, Any]]:
+    """
+    Read the last `limit` entries of a JSON-lines file, skipping bad lines.
+    Seeks back from the end in blocks, so cost depends on `limit`, not on
+    how long the history has grown.
+    """
+    if not path.exists():
+        return []
+    try:
+        with path.open("rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            blocks: List[bytes] = []
+            newlines = 0
+            # limit + 1 newlines guarantees `limit` complete lines
+            while pos > 0 and newlines <= limit:
+                step = min(_TAIL_BLOCK_SIZE, pos)
+                pos -= step
+                f.seek(pos)
+                block = f.read(step)
+                blocks.append(block)
+                newlines += block.count(b"\n")
+    except Exception:
+        return []
+    lines = b"".join(reversed(blocks)).splitlines()
+    if pos > 0:
+        lines = lines[1:]  # first line may be cut off mid-record
+    entries: List[Dict[str, Any]] = []
+    for line in lines[-limit:]:
+        try:
+            entries.append(orjson.loads(line))
+        except ValueError:
+            continue
+    return entries
 
-def _build_positions_snapshot(positions: List[Dict[str, Any]], market_summary: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    price_by_ticker = {m["ticker"]: float(m["current_price"]) for m in market_summary}
-    snapshot: List[Dict[str, Any]] = []
-    for pos in positions:
-        ticker = pos["ticker"]
-        qty = int(pos["quantity"])
-        purchase_price = float(pos["purchase_price"])
-        current_price = price_by_ticker.get(ticker)
-        snapshot.append(
-            {
-                "ticker": ticker,
-                "quantity": qty,
-                "purchase_price": purchase_price,
-                "current_price": current_price,
-            }
-        )
-    return snapshot
+def _write_json_list(path: Path, data: Iterable[Dict[str, Any]]) -> None:
+    """
+    Write atomically: stream items into a temp file as a JSON array (one
+    object per line, so generators are never materialized), then rename
+    over the target so readers never see a partially written file.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(b"[")
+        sep = b"\n"
+        for item in data:
+            f.write(sep)
+            f.write(orjson.dumps(item))
+            sep = b",\n"
+        f.write(b"\n]\n")
+    os.replace(tmp, path)
+
+def _iter_positions_snapshot(parsed_positions: List[Tuple[str, int, float]], price_by_ticker: Dict[str, float]) -> Iterator[Dict[str, Any]]:
+    for ticker, qty, purchase_price in parsed_positions:
+        yield {
+            "ticker": ticker,
+            "quantity": qty,
+            "purchase_price": purchase_price,
+            "current_price": price_by_ticker.get(ticker),
+        }
 
 def _append_trade_log(trade_recs: List[Dict[str, Any]], rationale: str) -> None:
     """
-    Append recommendations to trading_history.json (as the assignment asks to store AI recs).
+    Append recommendations to trading_history.jsonl (as the assignment asks to store AI recs).
+    One JSON object per line, so each tick is a single append with no re-read.
     """
-    history = _read_json_list(TRADES_FILE)
     entry = {
         "ai_recommendations": trade_recs,
         "rationale": rationale
     }
-    history.append(entry)
-    _write_json_list(TRADES_FILE, history)
+    with TRADES_FILE.open("ab") as f:
+        f.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
 
-def _post_trades_to_mothership(trade_id: str, trades: List[Dict[str, Any]]) -> Dict[str, Any]:
+async def _post_to_mothership(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     POST to /make_trade with x-api-key header.
-    Returns parsed JSON.
+    Returns parsed JSON. /make_trade executes trades and is not idempotent, so
+    the only retry (once, with backoff) is for failures where the request never
+    reached mothership; while the breaker is open, returns a 503 result
+    without calling mothership.
     """
+    if (
+        _BREAKER["failures"] >= BREAKER_THRESHOLD
+        and time.monotonic() - _BREAKER["opened_at"] < BREAKER_COOLDOWN_S
+    ):
+        return {"_http_status": 503, "error": "breaker open"}
+
     headers = {
         "Content-Type": "application/json",
         "x-api-key": TRADE_API_KEY
     }
-    payload = {
-        "id": trade_id,
-        "trades": trades
-    }
-    r = requests.post(TRADE_ENDPOINT, headers=headers, json=payload, timeout=20)
+    body = orjson.dumps(payload)
+    r = None
+    error = ""
+    for attempt in range(MOTHERSHIP_RETRIES + 1):
+        if attempt:
+            # exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(0, RETRY_BACKOFF_S * 2 ** attempt))
+        try:
+            r = await _async_client.post(TRADE_ENDPOINT, headers=headers, content=body)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            # No connection was made, so nothing was sent: safe to resend
+            error = f"Mothership request failed: {e!r}"
+            continue
+        except httpx.HTTPError as e:
+            # The trades may already have been applied; do not resend
+            error = f"Mothership request failed: {e!r}"
+        break
+
+    # Only transport errors, 5xx and 429 say mothership is unhealthy; a 4xx
+    # rejecting this particular trade still means it is up and answering
+    if r is None or r.status_code >= 500 or r.status_code == 429:
+        _BREAKER["failures"] += 1
+        _BREAKER["opened_at"] = time.monotonic()
+    else:
+        _BREAKER["failures"] = 0
+
+    if r is None:
+        return {"_http_status": 502, "error": error}
+
     try:
-        data = r.json()
+        data = orjson.loads(r.content)
     except Exception:
         data = {"error": f"Non-JSON response from mothership (status {r.status_code})"}
     if r.status_code == 200:
@@ -84,62 +204,174 @@ def _post_trades_to_mothership(trade_id: str, trades: List[Dict[str, Any]]) -> D
         data["_http_status"] = r.status_code
     return data
 
-def analyze_tick(payload: Dict[str, Any], trade_id: str) -> Dict[str, Any]:
+async def _post_single(trade_id: str, trades: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return await _post_to_mothership({"id": trade_id, "trades": trades})
+
+def _resolve(fut: asyncio.Future, result: Dict[str, Any]) -> None:
+    # the waiting /tick may have been cancelled meanwhile
+    if not fut.done():
+        fut.set_result(result)
+
+async def _flush_batch(batch: List[Tuple[str, List[Dict[str, Any]], asyncio.Future]]) -> None:
+    """
+    Send one flushed batch and resolve each tick's future with its own result.
+    Expects a 200 response shaped {"batch": [{"id": ..., "status": ..., ...}]}.
+    """
+    if len(batch) > 1 and _BATCH["supported"]:
+        resp = await _post_to_mothership(
+            {"batch": [{"id": trade_id, "trades": trades} for trade_id, trades, _ in batch]}
+        )
+        status = resp.get("_http_status")
+        if status == 200 and isinstance(resp.get("batch"), list):
+            by_id = {
+                item.get("id"): item for item in resp["batch"] if isinstance(item, dict)
+            }
+            for trade_id, _, fut in batch:
+                item = by_id.get(trade_id)
+                if item is None:
+                    _resolve(fut, {"_http_status": 502, "error": "Trade id missing from batch response"})
+                else:
+                    _resolve(fut, {**item, "_http_status": item.get("status", 200)})
+            _BATCH["limit"] = min(_BATCH["limit"] * BATCH_GROWTH_FACTOR, BATCH_MAX_SIZE)
+            return
+
+        # Anything but a well-formed batch 200: stop batching for good
+        _BATCH["supported"] = False
+        if status == 200:
+            # 200 without a "batch" list: the platform ignored the batch key,
+            # so nothing confirms these ticks. Report them as failed (without
+            # resending, the POST may have had effects).
+            for _, _, fut in batch:
+                _resolve(fut, {"_http_status": 502, "error": "Mothership response has no batch results"})
+            return
+        if not (isinstance(status, int) and 400 <= status < 500):
+            # 5xx or transport failure: the batch may have been applied, so
+            # it is not resent
+            for _, _, fut in batch:
+                _resolve(fut, dict(resp))
+            return
+        # 4xx: the batch body was rejected outright; resend one by one
+
+    results = await asyncio.gather(*(_post_single(trade_id, trades) for trade_id, trades, _ in batch))
+    for (_, _, fut), result in zip(batch, results):
+        _resolve(fut, result)
+    if _BATCH["supported"]:
+        _BATCH["limit"] = min(_BATCH["limit"] * BATCH_GROWTH_FACTOR, BATCH_MAX_SIZE)
+
+async def _send_batch(batch: List[Tuple[str, List[Dict[str, Any]], asyncio.Future]]) -> None:
+    try:
+        await _flush_batch(batch)
+    except Exception as e:
+        for _, _, fut in batch:
+            if not fut.done():
+                fut.set_exception(e)
+
+async def _run_batch_flusher() -> None:
+    """
+    Drain _PENDING, flushing every BATCH_FLUSH_S or once the batch is full.
+    Each flush runs as its own task so a slow POST does not hold up the next
+    batch.
+    """
+    loop = asyncio.get_running_loop()
+    while _PENDING:
+        deadline = loop.time() + BATCH_FLUSH_S
+        while len(_PENDING) < _BATCH["limit"]:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            _BATCH_WAKEUP.clear()
+            try:
+                await asyncio.wait_for(_BATCH_WAKEUP.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        batch = [_PENDING.popleft() for _ in range(min(len(_PENDING), _BATCH["limit"]))]
+        task = asyncio.create_task(_send_batch(batch))
+        _BATCH_SENDS.add(task)
+        task.add_done_callback(_BATCH_SENDS.discard)
+
+async def _post_trades_to_mothership(trade_id: str, trades: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Send one tick's trades to mothership, through the batcher when enabled.
+    """
+    global _batch_flusher
+    if not (MOTHERSHIP_BATCHING and _BATCH["supported"]):
+        return await _post_single(trade_id, trades)
+
+    fut = asyncio.get_running_loop().create_future()
+    _PENDING.append((trade_id, trades, fut))
+    if _batch_flusher is None or _batch_flusher.done():
+        _batch_flusher = asyncio.create_task(_run_batch_flusher())
+    elif len(_PENDING) >= _BATCH["limit"]:
+        _BATCH_WAKEUP.set()
+    return await fut
+
+async def analyze_tick_async(payload: Dict[str, Any], trade_id: str) -> Dict[str, Any]:
     """
     - Join data to compute unrealized P&L.
     - Build and write positions snapshot.
     - Ask AI for recommendations (tool/function format).
-    - Store recommendations in trading_history.json.
+    - Store recommendations in trading_history.jsonl.
     - POST recommendations to mothership /make_trade.
     - If 200, update local positions file from returned 'Positions'.
     """
     positions: List[Dict[str, Any]] = payload.get("Positions", [])
     market_summary: List[Dict[str, Any]] = payload.get("Market_Summary", [])
 
+    # Built once and reused for P&L, the snapshot, and the post-trade merge
     price_by_ticker = {m["ticker"]: float(m["current_price"]) for m in market_summary}
+    parsed_positions = [
+        (pos["ticker"], int(pos["quantity"]), float(pos["purchase_price"]))
+        for pos in positions
+    ]
 
     evaluated = 0
     total_unrealized = 0.0
-    for pos in positions:
-        ticker = pos["ticker"]
-        qty = int(pos["quantity"])
-        purchase_price = float(pos["purchase_price"])
+    for ticker, qty, purchase_price in parsed_positions:
         if ticker in price_by_ticker:
             current = price_by_ticker[ticker]
             pnl = (current - purchase_price) * qty
             total_unrealized += pnl
             evaluated += 1
 
-    # Build snapshot with current prices and save
-    snapshot = _build_positions_snapshot(positions, market_summary)
-    _write_json_list(POSITIONS_FILE, snapshot)
+    loop = asyncio.get_running_loop()
+
+    # Build snapshot with current prices and save it in a worker thread
+    # while the AI call is in flight
+    snapshot = _iter_positions_snapshot(parsed_positions, price_by_ticker)
+    snapshot_fut = loop.run_in_executor(_IO_POOL, _write_json_list, POSITIONS_FILE, snapshot)
 
     # --- AI step ---
-    ai_out = get_trade_recommendations(payload)
+    _, ai_out = await asyncio.gather(snapshot_fut, get_trade_recommendations_async(payload))
     trades = ai_out.get("trades", [])
     rationale = ai_out.get("rationale", "")
 
     # Store the AI recommendations (not applying locally; mothership will apply)
-    _append_trade_log(trades, rationale)
-
-    # --- POST to mothership ---
-    mothership_resp = _post_trades_to_mothership(trade_id, trades)
+    # in a worker thread, overlapped with the POST to mothership. A failed log
+    # write must not abandon the POST or report already-placed trades as failed.
+    log_fut = loop.run_in_executor(_IO_POOL, _append_trade_log, trades, rationale)
+    log_err, mothership_resp = await asyncio.gather(
+        log_fut, _post_trades_to_mothership(trade_id, trades), return_exceptions=True
+    )
+    if isinstance(mothership_resp, BaseException):
+        raise mothership_resp
+    if isinstance(log_err, BaseException):
+        logger.error("Could not append to %s", TRADES_FILE, exc_info=log_err)
 
     # If successful, overwrite local positions with returned Positions (if present)
     if mothership_resp.get("_http_status") == 200 and "Positions" in mothership_resp:
         returned_positions = mothership_resp["Positions"]
         # try to reattach current_price using today's market_summary if tickers match
-        price_by_ticker = {m["ticker"]: float(m["current_price"]) for m in market_summary}
-        merged = []
-        for p in returned_positions:
-            cp = price_by_ticker.get(p["ticker"])
-            merged.append({
-                "ticker": p["ticker"],
+        merged = (
+            {
+                "ticker": t,
                 "quantity": int(p["quantity"]),
                 "purchase_price": float(p["purchase_price"]),
-                "current_price": cp
-            })
-        _write_json_list(POSITIONS_FILE, merged)
+                "current_price": price_by_ticker.get(t),
+            }
+            for p in returned_positions
+            for t in (p["ticker"],)
+        )
+        await loop.run_in_executor(_IO_POOL, _write_json_list, POSITIONS_FILE, merged)
 
     result = {
         "summary": {
@@ -152,7 +384,16 @@ def analyze_tick(payload: Dict[str, Any], trade_id: str) -> Dict[str, Any]:
     }
     return result
 
+async def close_clients() -> None:
+    """Close pooled HTTP connections and the disk I/O pool when the server shuts down."""
+    await _async_client.aclose()
+    _IO_POOL.shutdown(wait=True)
+
 def load_dashboard_data() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     positions = _read_json_list(POSITIONS_FILE)
-    trades = _read_json_list(TRADES_FILE)
+    trades = _read_jsonl_tail(TRADES_FILE, DASHBOARD_HISTORY_LIMIT)
     return positions, trades
+
+async def load_dashboard_data_async() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """load_dashboard_data on the disk I/O pool, keeping file reads off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_IO_POOL, load_dashboard_data)
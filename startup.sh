@@ -0,0 +1,6 @@
+#!/bin/sh
+# App Service startup command (Configuration > General settings > Startup Command):
+#   sh startup.sh
+# app:app is an ASGI (Quart) app, so it must be served by hypercorn, not
+# the platform's default WSGI gunicorn worker.
+exec hypercorn app:app --bind "0.0.0.0:${PORT:-8000}" --workers 1 --worker-class asyncio
@@ -1,6 +1,77 @@
 # validators.py
 from typing import Dict, Any, Tuple
 
+import fastjsonschema
+
+# Required keys in the order they were always checked (and reported) in
+_TOP_REQUIRED = ("Positions", "Market_Summary", "market_history")
+_POS_REQUIRED = ("ticker", "quantity", "purchase_price")
+_MS_REQUIRED = ("ticker", "current_price", "category")
+_MH_REQUIRED = ("ticker", "price", "day")
+_ITEM_REQUIRED = {
+    "Positions": _POS_REQUIRED,
+    "Market_Summary": _MS_REQUIRED,
+    "market_history": _MH_REQUIRED,
+}
+
+# JSON Schema mirroring the /tick payload requirements; compiled once at
+# import into a single generated Python function.
+_SCHEMA = {
+    "type": "object",
+    "required": list(_TOP_REQUIRED),
+    "properties": {
+        "Positions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": list(_POS_REQUIRED),
+            },
+        },
+        "Market_Summary": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": list(_MS_REQUIRED),
+            },
+        },
+        "market_history": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": list(_MH_REQUIRED),
+                # Tester uses 'day' as a string like '2025-04-03'
+                "properties": {"day": {"type": "string"}},
+            },
+        },
+    },
+}
+
+_VALIDATE = fastjsonschema.compile(_SCHEMA)
+
+
+def _first_missing(required: Tuple[str, ...], obj: Dict[str, Any]) -> str:
+    """First missing key in check order, found via one set difference."""
+    missing = set(required) - obj.keys()
+    return next(f for f in required if f in missing)
+
+
+def _describe(e: fastjsonschema.JsonSchemaValueException) -> str:
+    """
+    Map schema failures back to the exact messages the API has always
+    returned; anything unrecognised keeps fastjsonschema's own message.
+    """
+    path = e.path  # e.g. ['data', 'Positions', '0'] or [..., '0', 'day']
+    if e.rule == "required" and type(e.value) is dict:
+        if len(path) == 3 and path[1] in _ITEM_REQUIRED:
+            key, idx = path[1], path[2]
+            return f"{key}[{idx}] missing '{_first_missing(_ITEM_REQUIRED[key], e.value)}'"
+    elif e.rule == "type":
+        if len(path) == 3:
+            return f"{path[1]}[{path[2]}] must be an object"
+        if path[1:2] == ["market_history"] and path[-1] == "day":
+            return "market_history.day must be a date string"
+    return str(e)
+
 
 def validate_tick_payload(payload: Dict[str, Any]) -> Tuple[bool, str]:
     """
@@ -14,42 +85,23 @@ def validate_tick_payload(payload: Dict[str, Any]) -> Tuple[bool, str]:
       - 'market_history.day' must be a date string (YYYY-MM-DD),
         but we don't enforce exact format, just that it's a string.
     """
+    # Top-level shape first, in the original order, so every key is known to
+    # be a list before any items are looked at (the schema checks items of
+    # the first key before the type of the next)
     if not isinstance(payload, dict):
         return False, "Payload must be a JSON object"
-
-    required_lists = ["Positions", "Market_Summary", "market_history"]
-    for key in required_lists:
+    for key in _TOP_REQUIRED:
         if key not in payload:
             return False, f"Missing required field: {key}"
         if not isinstance(payload[key], list):
             return False, f"{key} must be a list"
 
-    # --- Positions checks ---
-    for idx, pos in enumerate(payload["Positions"]):
-        if not isinstance(pos, dict):
-            return False, f"Positions[{idx}] must be an object"
-        for field in ("ticker", "quantity", "purchase_price"):
-            if field not in pos:
-                return False, f"Positions[{idx}] missing '{field}'"
-
-    # --- Market_Summary checks ---
-    for idx, row in enumerate(payload["Market_Summary"]):
-        if not isinstance(row, dict):
-            return False, f"Market_Summary[{idx}] must be an object"
-        for field in ("ticker", "current_price", "category"):
-            if field not in row:
-                return False, f"Market_Summary[{idx}] missing '{field}'"
-
-    # --- market_history checks ---
-    for idx, row in enumerate(payload["market_history"]):
-        if not isinstance(row, dict):
-            return False, f"market_history[{idx}] must be an object"
-        for field in ("ticker", "price", "day"):
-            if field not in row:
-                return False, f"market_history[{idx}] missing '{field}'"
-        # Tester uses 'day' as a string like '2025-04-03'
-        if not isinstance(row["day"], str):
-            return False, "market_history.day must be a date string"
+    try:
+        _VALIDATE(payload)
+    except fastjsonschema.JsonSchemaValueException as e:
+        return False, _describe(e)
+    except fastjsonschema.JsonSchemaException as e:
+        return False, str(e)
 
     # If we get here, payload looks good
     return True, "OK"